@@ -1,9 +1,24 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import json
-from datetime import datetime, timedelta
-import uuid
+import os
+import atexit
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from functools import lru_cache
+from operator import itemgetter
 import calendar
+import heapq
+import queue
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from sortedcontainers import SortedList
 
 # Configure page
 st.set_page_config(
@@ -12,48 +27,231 @@ st.set_page_config(
     layout="wide"
 )
 
+# Priority lookup tables, built once instead of per call/per task
+_PRIORITY_ORDER = {'High': 1, 'Medium': 2, 'Low': 3}
+_PRIORITY_ES = {'High': 'Alta', 'Medium': 'Media', 'Low': 'Baja'}
+_PRIORITIES = ('High', 'Medium', 'Low')
+
+# Spanish calendar names, built once instead of per call
+_DAYS_ES = ('Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo')
+_MONTHS_ES = ('', 'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+              'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre')
+
+# Indexed by the stored priority_rank (1=High .. 3=Low, 4=unknown), so the
+# display loops do a tuple index instead of a dict lookup per task
+_RANK_ICON = ('', '🔴', '🟡', '🟢', '⚪')
+_RANK_ES = ('', 'Alta', 'Media', 'Baja', '')
+
+# Sort key over fields stored on every task; itemgetter runs in C, so the
+# per-comparison cost beats a Python lambda doing dict lookups
+_SORT_KEY = itemgetter('completed', 'priority_rank', 'title')
+
+# Current day, computed once per rerun; every interaction re-executes the
+# whole script, so repeated datetime.now()/strftime calls add up
+TODAY = datetime.now().date()
+TODAY_STR = TODAY.isoformat()
+
 # Initialize session state
 if 'tasks' not in st.session_state:
     st.session_state.tasks = {}
 if 'view_mode' not in st.session_state:
     st.session_state.view_mode = 'daily'
 if 'selected_date' not in st.session_state:
-    st.session_state.selected_date = datetime.now().date()
+    st.session_state.selected_date = TODAY
 if 'selected_week_start' not in st.session_state:
     # Get Monday of current week
-    today = datetime.now().date()
-    days_since_monday = today.weekday()
-    st.session_state.selected_week_start = today - timedelta(days=days_since_monday)
+    st.session_state.selected_week_start = TODAY - timedelta(days=TODAY.weekday())
 if 'last_activity' not in st.session_state:
     st.session_state.last_activity = datetime.now()
 if 'auto_refresh_enabled' not in st.session_state:
     st.session_state.auto_refresh_enabled = False
+if '_tasks_dirty' not in st.session_state:
+    st.session_state._tasks_dirty = False
+if '_tasks_version' not in st.session_state:
+    st.session_state._tasks_version = 0
+if '_counts' not in st.session_state:
+    # Per-date [total, completed] counters, maintained at mutation time so
+    # the calendar and statistics never need to rescan the task store
+    st.session_state._counts = {}
+    st.session_state._grand = [0, 0]
+if '_completed' not in st.session_state:
+    # Columnar {date_str: {task_id: bool}} mirror of the completed flag,
+    # so scan-heavy paths (rollover, recounts) never touch the task dicts
+    st.session_state._completed = {}
+if '_sorted_dates' not in st.session_state:
+    # Date keys kept in sorted order so range queries (rollover) and
+    # recent-date slices don't have to sort or scan the whole store
+    st.session_state._sorted_dates = SortedList()
+if '_next_id' not in st.session_state:
+    st.session_state._next_id = 0
+if 'editing_task_id' not in st.session_state:
+    # At most one edit form is open at a time
+    st.session_state.editing_task_id = None
+
+def _new_id():
+    """Generate a session-unique task id
+
+    A monotonic counter is enough here (ids are only dict keys and widget
+    keys) and avoids the os.urandom read behind every uuid4.
+    """
+    st.session_state._next_id += 1
+    return f"t{st.session_state._next_id:x}"
+
+@lru_cache(maxsize=4096)
+def _parse_date_key(date_str):
+    """Parse a 'YYYY-MM-DD' task key without going through strptime"""
+    return date.fromisoformat(date_str)
+
+def _dumps(obj, indent=False):
+    """Serialize to JSON bytes, using orjson when available"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=str, option=option)
+    return json.dumps(obj, indent=2 if indent else None, default=str).encode()
+
+def _loads(data):
+    """Parse JSON from bytes/str, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 def save_tasks():
-    """Save tasks to session state (automatic backup)"""
+    """Mark tasks as needing a save (flushed once at the end of the rerun)"""
+    st.session_state._tasks_dirty = True
+    st.session_state._tasks_version += 1
+
+def _recount_tasks():
+    """Rebuild the per-date counters and completed column after a bulk change"""
+    counts = {}
+    grand = [0, 0]
+    completed_col = {}
+    next_id = st.session_state._next_id
+    for date_str, tasks in st.session_state.tasks.items():
+        if not tasks:
+            continue
+        # Keep the id counter ahead of anything loaded from disk/backup
+        for task_id in tasks:
+            if task_id.startswith('t'):
+                try:
+                    next_id = max(next_id, int(task_id[1:], 16))
+                except ValueError:
+                    pass
+        # Backfill priority_rank on tasks loaded from older files/backups
+        for task in tasks.values():
+            if 'priority_rank' not in task:
+                task['priority_rank'] = _PRIORITY_ORDER.get(task.get('priority'), 4)
+        flags = {task_id: task['completed'] for task_id, task in tasks.items()}
+        completed_col[date_str] = flags
+        # Single NumPy reduction instead of a Python-level generator sum
+        date_completed = int(np.fromiter(flags.values(), dtype=np.bool_,
+                                         count=len(flags)).sum())
+        counts[date_str] = [len(flags), date_completed]
+        grand[0] += len(flags)
+        grand[1] += date_completed
+    st.session_state._counts = counts
+    st.session_state._grand = grand
+    st.session_state._completed = completed_col
+    st.session_state._sorted_dates = SortedList(counts)
+    st.session_state._next_id = next_id
+
+def _count_add(date_str, task_id, task):
+    """Add one task to the per-date counters and completed column"""
+    counts = st.session_state._counts.get(date_str)
+    if counts is None:
+        counts = st.session_state._counts[date_str] = [0, 0]
+        st.session_state._sorted_dates.add(date_str)
+    counts[0] += 1
+    st.session_state._grand[0] += 1
+    if task['completed']:
+        counts[1] += 1
+        st.session_state._grand[1] += 1
+    st.session_state._completed.setdefault(date_str, {})[task_id] = task['completed']
+
+def _count_remove(date_str, task_id, task):
+    """Drop one task from the per-date counters and completed column"""
+    counts = st.session_state._counts[date_str]
+    counts[0] -= 1
+    st.session_state._grand[0] -= 1
+    if task['completed']:
+        counts[1] -= 1
+        st.session_state._grand[1] -= 1
+    if counts[0] == 0:
+        del st.session_state._counts[date_str]
+        del st.session_state._completed[date_str]
+        st.session_state._sorted_dates.remove(date_str)
+    else:
+        del st.session_state._completed[date_str][task_id]
+
+def _write_snapshot(snapshot):
+    """Serialize a tasks snapshot and swap it into place atomically"""
     try:
-        # Try to save to file for local development
-        with open('tasks.json', 'w') as f:
-            json.dump(st.session_state.tasks, f, default=str)
+        tmp_path = 'tasks.json.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_dumps(snapshot))
+        os.replace(tmp_path, 'tasks.json')
     except Exception:
         # In deployed environments, file writing might not work
         # Tasks are already saved in session state
         pass
 
+def _drain_writes(write_queue):
+    """Background loop writing each queued snapshot to disk"""
+    while True:
+        _write_snapshot(write_queue.get())
+
+@st.cache_resource
+def _get_writer_queue():
+    """Single-slot queue feeding a daemon writer thread"""
+    write_queue = queue.Queue(maxsize=1)
+    threading.Thread(target=_drain_writes, args=(write_queue,),
+                     daemon=True).start()
+
+    # Write anything still queued when the server shuts down
+    def _flush_on_exit():
+        try:
+            _write_snapshot(write_queue.get_nowait())
+        except queue.Empty:
+            pass
+    atexit.register(_flush_on_exit)
+    return write_queue
+
+def _flush_tasks():
+    """Hand the pending tasks snapshot to the background writer"""
+    if not st.session_state.get('_tasks_dirty'):
+        return
+    write_queue = _get_writer_queue()
+    snapshot = dict(st.session_state.tasks)
+    try:
+        write_queue.put_nowait(snapshot)
+    except queue.Full:
+        # Coalesce bursts: the latest snapshot wins
+        with write_queue.mutex:
+            if write_queue.queue:
+                write_queue.queue[0] = snapshot
+            else:
+                write_queue.queue.append(snapshot)
+    st.session_state._tasks_dirty = False
+
 def load_tasks():
-    """Load tasks from JSON file (only works locally)"""
+    """Load tasks from JSON file once per session (only works locally)"""
+    if st.session_state.get('_tasks_loaded'):
+        # Reruns after the first skip the file read and JSON parse entirely
+        return
     try:
-        with open('tasks.json', 'r') as f:
-            loaded_tasks = json.load(f)
-            # Only load if we don't have tasks in session state already
-            if not st.session_state.tasks:
-                st.session_state.tasks = loaded_tasks
+        loaded_tasks = _loads(Path('tasks.json').read_bytes())
+        # Only load if we don't have tasks in session state already
+        if not st.session_state.tasks:
+            st.session_state.tasks = loaded_tasks
+            _recount_tasks()
     except FileNotFoundError:
         st.session_state.tasks = {}
     except Exception:
         # In deployed environments, this is expected to fail
         if 'tasks' not in st.session_state:
             st.session_state.tasks = {}
+    st.session_state._tasks_loaded = True
 
 def backup_tasks_to_browser():
     """Create a downloadable backup of tasks"""
@@ -63,7 +261,8 @@ def backup_tasks_to_browser():
             'export_date': datetime.now().isoformat(),
             'version': '1.0'
         }
-        return json.dumps(backup_data, indent=2, default=str)
+        # Bytes are fine for st.download_button and skip a decode copy
+        return _dumps(backup_data, indent=True)
     except Exception as e:
         st.error(f"Error creating backup: {e}")
         return None
@@ -71,17 +270,19 @@ def backup_tasks_to_browser():
 def restore_tasks_from_backup(uploaded_file):
     """Restore tasks from uploaded backup file"""
     try:
-        backup_data = json.load(uploaded_file)
-        
+        backup_data = _loads(uploaded_file.read())
+
         # Validate backup structure
         if 'tasks' in backup_data:
             st.session_state.tasks = backup_data['tasks']
+            _recount_tasks()
             save_tasks()  # Try to save locally if possible
             return True
         else:
             st.error("Formato de archivo de respaldo inválido")
             return False
-    except json.JSONDecodeError:
+    except ValueError:
+        # Covers json.JSONDecodeError and orjson.JSONDecodeError
         st.error("Error: El archivo no es un JSON válido")
         return False
     except Exception as e:
@@ -90,7 +291,7 @@ def restore_tasks_from_backup(uploaded_file):
 
 def add_task(date_str, title, priority, description=""):
     """Add a new task"""
-    task_id = str(uuid.uuid4())
+    task_id = _new_id()
     if date_str not in st.session_state.tasks:
         st.session_state.tasks[date_str] = {}
     
@@ -98,106 +299,115 @@ def add_task(date_str, title, priority, description=""):
         'title': title,
         'description': description,
         'priority': priority,
+        'priority_rank': _PRIORITY_ORDER.get(priority, 4),
         'completed': False,
         'created_at': datetime.now().isoformat()
     }
+    _count_add(date_str, task_id, st.session_state.tasks[date_str][task_id])
     save_tasks()
 
 def toggle_task_completion(date_str, task_id):
     """Toggle task completion status"""
-    if date_str in st.session_state.tasks and task_id in st.session_state.tasks[date_str]:
-        st.session_state.tasks[date_str][task_id]['completed'] = not st.session_state.tasks[date_str][task_id]['completed']
+    if (day := st.session_state.tasks.get(date_str)) and (task := day.get(task_id)) is not None:
+        task['completed'] = not task['completed']
+        delta = 1 if task['completed'] else -1
+        st.session_state._counts[date_str][1] += delta
+        st.session_state._grand[1] += delta
+        st.session_state._completed[date_str][task_id] = task['completed']
         save_tasks()
 
 def delete_task(date_str, task_id):
     """Delete a task"""
-    if date_str in st.session_state.tasks and task_id in st.session_state.tasks[date_str]:
-        del st.session_state.tasks[date_str][task_id]
-        if not st.session_state.tasks[date_str]:
+    if (day := st.session_state.tasks.get(date_str)) and (task := day.pop(task_id, None)) is not None:
+        _count_remove(date_str, task_id, task)
+        if not day:
             del st.session_state.tasks[date_str]
         save_tasks()
 
 def edit_task(old_date_str, task_id, new_date_str, title, priority, description):
     """Edit a task and optionally move it to a different date"""
-    if old_date_str in st.session_state.tasks and task_id in st.session_state.tasks[old_date_str]:
-        # Get the existing task
-        task = st.session_state.tasks[old_date_str][task_id].copy()
-        
-        # Update task details
+    if (day := st.session_state.tasks.get(old_date_str)) and (task := day.get(task_id)) is not None:
+        # Update the existing dict in place; no shallow copy needed
         task['title'] = title
         task['priority'] = priority
+        task['priority_rank'] = _PRIORITY_ORDER.get(priority, 4)
         task['description'] = description
         task['modified_at'] = datetime.now().isoformat()
-        
-        # If moving to a different date
+
+        # If moving to a different date, just re-key the same object
         if old_date_str != new_date_str:
-            # Remove from old date
-            del st.session_state.tasks[old_date_str][task_id]
-            if not st.session_state.tasks[old_date_str]:
+            _count_remove(old_date_str, task_id, task)
+            day.pop(task_id)
+            if not day:
                 del st.session_state.tasks[old_date_str]
-            
-            # Add to new date
-            if new_date_str not in st.session_state.tasks:
-                st.session_state.tasks[new_date_str] = {}
-            st.session_state.tasks[new_date_str][task_id] = task
-        else:
-            # Just update in place
-            st.session_state.tasks[old_date_str][task_id] = task
-        
+
+            st.session_state.tasks.setdefault(new_date_str, {})[task_id] = task
+            _count_add(new_date_str, task_id, task)
+
         save_tasks()
 
+@lru_cache(maxsize=4096)
+def _iso(date_obj):
+    """Cached 'YYYY-MM-DD' key for a date"""
+    return date_obj.isoformat()
+
+@lru_cache(maxsize=4096)
 def format_date_spanish(date_obj):
     """Format date in Spanish format (DD/MM/YYYY)"""
-    return date_obj.strftime('%d/%m/%Y')
+    # f-string beats strftime here: no format-string parse per call
+    return f"{date_obj.day:02d}/{date_obj.month:02d}/{date_obj.year}"
 
+@lru_cache(maxsize=4096)
 def format_date_long_spanish(date_obj):
     """Format date in long Spanish format"""
-    days_spanish = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
-    months_spanish = ['', 'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
-                     'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
-    
-    day_name = days_spanish[date_obj.weekday()]
-    month_name = months_spanish[date_obj.month]
-    
+    day_name = _DAYS_ES[date_obj.weekday()]
+    month_name = _MONTHS_ES[date_obj.month]
+
     return f"{day_name}, {date_obj.day} de {month_name} de {date_obj.year}"
 
 def move_incomplete_tasks():
     """Move incomplete tasks from previous days to today"""
-    today = datetime.now().date()
-    today_str = today.strftime('%Y-%m-%d')
+    today = TODAY
+    today_str = TODAY_STR
     moved_count = 0
-    
-    dates_to_check = []
-    for date_str in list(st.session_state.tasks.keys()):
-        try:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
-            if date_obj < today:
-                dates_to_check.append(date_str)
-        except ValueError:
-            continue
+
+    # ISO date keys sort chronologically, so the stale prefix is a single
+    # O(log N + k) range query instead of a parse-and-filter over every key
+    dates_to_check = list(st.session_state._sorted_dates.irange(
+        maximum=today_str, inclusive=(True, False)))
     
     for date_str in dates_to_check:
-        if date_str in st.session_state.tasks:
-            tasks_to_move = []
-            for task_id, task in st.session_state.tasks[date_str].items():
-                if not task['completed']:
-                    tasks_to_move.append((task_id, task))
-            
-            for task_id, task in tasks_to_move:
-                if today_str not in st.session_state.tasks:
-                    st.session_state.tasks[today_str] = {}
-                
-                new_task_id = str(uuid.uuid4())
-                st.session_state.tasks[today_str][new_task_id] = task.copy()
-                st.session_state.tasks[today_str][new_task_id]['moved_from'] = date_str
-                
-                del st.session_state.tasks[date_str][task_id]
-                moved_count += 1
-            
-            if not st.session_state.tasks[date_str]:
-                del st.session_state.tasks[date_str]
+        day_tasks = st.session_state.tasks.get(date_str)
+        if not day_tasks:
+            continue
+
+        # Split the day in one pass over the completed column instead of
+        # deleting moved tasks one by one out of the old dict
+        flags = st.session_state._completed.get(date_str, {})
+        keep = {task_id: day_tasks[task_id]
+                for task_id, done in flags.items() if done}
+        move = [(task_id, day_tasks[task_id])
+                for task_id, done in flags.items() if not done]
+        if not move:
+            continue
+
+        if keep:
+            st.session_state.tasks[date_str] = keep
+        else:
+            del st.session_state.tasks[date_str]
+
+        today_tasks = st.session_state.tasks.setdefault(today_str, {})
+        for task_id, task in move:
+            # The task leaves its old date, so mutate it rather than copy,
+            # and keep its id; regenerate only on an actual collision
+            task['moved_from'] = date_str
+            if task_id in today_tasks:
+                task_id = _new_id()
+            today_tasks[task_id] = task
+        moved_count += len(move)
     
     if moved_count > 0:
+        _recount_tasks()
         save_tasks()
         st.success(f"¡Se movieron {moved_count} tareas incompletas a hoy!")
 
@@ -207,189 +417,298 @@ def get_sorted_tasks(date_str):
         return []
     
     tasks = st.session_state.tasks[date_str]
-    priority_order = {'High': 1, 'Medium': 2, 'Low': 3}
-    
+
     sorted_tasks = sorted(
         tasks.items(),
-        key=lambda x: (x[1]['completed'], priority_order.get(x[1]['priority'], 4), x[1]['title'])
+        key=lambda kv: _SORT_KEY(kv[1])
     )
-    
+
     return sorted_tasks
 
-def get_priority_color(priority):
-    """Get color for priority display"""
-    colors = {
-        'High': '🔴',
-        'Medium': '🟡', 
-        'Low': '🟢'
-    }
-    return colors.get(priority, '⚪')
+def get_top_tasks(date_str, k=5):
+    """Get the first k tasks for a date in priority order
+
+    Uses heapq.nsmallest (O(N log k)) instead of fully sorting the day,
+    which is all the weekly view needs.
+    """
+    if date_str not in st.session_state.tasks:
+        return []
+
+    tasks = st.session_state.tasks[date_str]
+
+    return heapq.nsmallest(
+        k,
+        tasks.items(),
+        key=lambda kv: _SORT_KEY(kv[1])
+    )
 
+@st.cache_data(show_spinner=False)
+def _month_grid(year, month, today_str, month_counts):
+    """Build the month grid of day labels as a DataFrame
+
+    A pure function of its arguments: st.cache_data is shared across
+    sessions, so the month's own counts are part of the key rather than a
+    session-local version counter (which collided between sessions).
+    """
+    counts = dict(month_counts)
+    today = date.fromisoformat(today_str)
+    rows = []
+    for week in calendar.monthcalendar(year, month):
+        row = []
+        for day in week:
+            if day == 0:
+                row.append("")
+                continue
+            total, done = counts.get(f"{year:04d}-{month:02d}-{day:02d}", (0, 0))
+            label = str(day)
+            if total:
+                label += f" ({done}/{total})"
+            if date(year, month, day) == today:
+                label += " 📍"
+            row.append(label)
+        rows.append(row)
+    return pd.DataFrame(rows, columns=['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom'])
+
+@st.fragment
 def create_calendar_widget():
     """Create a visual calendar widget"""
-    st.subheader("📅 Calendario")
-    
-    # Month navigation
-    col1, col2, col3 = st.columns([1, 2, 1])
-    
-    current_date = st.session_state.selected_date
-    current_month = current_date.month
-    current_year = current_date.year
-    
-    with col1:
-        if st.button("◀", key="prev_month"):
-            if current_month == 1:
-                new_date = current_date.replace(year=current_year-1, month=12)
-            else:
-                new_date = current_date.replace(month=current_month-1)
-            st.session_state.selected_date = new_date
-            st.rerun()
+    # Collapsing the expander lets users who navigate by date picker
+    # skip the grid; its state persists across reruns
+    with st.expander("📅 Calendario", expanded=True):
     
-    with col2:
-        months_spanish = ['', 'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
-                         'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
-        st.write(f"**{months_spanish[current_month]} {current_year}**")
+        # Month navigation
+        col1, col2, col3 = st.columns([1, 2, 1])
     
-    with col3:
-        if st.button("▶", key="next_month"):
-            if current_month == 12:
-                new_date = current_date.replace(year=current_year+1, month=1)
-            else:
-                new_date = current_date.replace(month=current_month+1)
-            st.session_state.selected_date = new_date
-            st.rerun()
+        current_date = st.session_state.selected_date
+        current_month = current_date.month
+        current_year = current_date.year
     
-    # Calendar grid
-    cal = calendar.monthcalendar(current_year, current_month)
+        with col1:
+            if st.button("◀", key="prev_month"):
+                if current_month == 1:
+                    new_date = current_date.replace(year=current_year-1, month=12)
+                else:
+                    new_date = current_date.replace(month=current_month-1)
+                st.session_state.selected_date = new_date
+                st.rerun()
     
-    # Days of week header
-    days = ['Lun', 'Mar', 'Mié', 'Jue', 'Vie', 'Sáb', 'Dom']
-    cols = st.columns(7)
-    for i, day in enumerate(days):
-        with cols[i]:
-            st.markdown(f"**{day}**")
+        with col2:
+            st.write(f"**{_MONTHS_ES[current_month]} {current_year}**")
     
-    # Calendar days
-    for week in cal:
-        cols = st.columns(7)
-        for i, day in enumerate(week):
-            with cols[i]:
-                if day == 0:
-                    st.write("")
+        with col3:
+            if st.button("▶", key="next_month"):
+                if current_month == 12:
+                    new_date = current_date.replace(year=current_year+1, month=1)
                 else:
-                    date_obj = datetime(current_year, current_month, day).date()
-                    date_str = date_obj.strftime('%Y-%m-%d')
-                    
-                    # Check if date has tasks
-                    task_count = len(st.session_state.tasks.get(date_str, {}))
-                    completed_count = sum(1 for task in st.session_state.tasks.get(date_str, {}).values() if task['completed'])
-                    
-                    # Styling for today and selected date
-                    is_today = date_obj == datetime.now().date()
-                    is_selected = date_obj == st.session_state.selected_date
-                    
-                    button_label = f"{day}"
-                    if task_count > 0:
-                        button_label += f"\n({completed_count}/{task_count})"
-                    
-                    button_type = "primary" if is_selected else "secondary"
-                    if is_today and not is_selected:
-                        button_label += " 📍"
-                    
-                    if st.button(button_label, key=f"cal_{date_str}", type=button_type, use_container_width=True):
-                        st.session_state.selected_date = date_obj
-                        # Update week start if in weekly mode
-                        if st.session_state.view_mode == 'weekly':
-                            days_since_monday = date_obj.weekday()
-                            st.session_state.selected_week_start = date_obj - timedelta(days=days_since_monday)
-                        st.rerun()
+                    new_date = current_date.replace(month=current_month+1)
+                st.session_state.selected_date = new_date
+                st.rerun()
+    
+        # Calendar grid: one dataframe widget with cell selection instead of
+        # ~42 buttons inside 7-column containers. The month's counts come
+        # from one range query over the sorted date index
+        month_start = f"{current_year:04d}-{current_month:02d}-01"
+        if current_month == 12:
+            month_end = f"{current_year + 1:04d}-01-01"
+        else:
+            month_end = f"{current_year:04d}-{current_month + 1:02d}-01"
+        month_counts = tuple(
+            (d, tuple(st.session_state._counts[d]))
+            for d in st.session_state._sorted_dates.irange(
+                month_start, month_end, inclusive=(True, False)))
+        month_df = _month_grid(current_year, current_month, TODAY_STR,
+                               month_counts)
+
+        event = st.dataframe(
+            month_df,
+            key=f"cal_grid_{current_year}_{current_month}",
+            hide_index=True,
+            use_container_width=True,
+            on_select="rerun",
+            selection_mode="single-cell",
+        )
+
+        # The selection sticks in widget state across reruns, so only act
+        # when it changes; re-handling the stale cell would keep reverting
+        # selected_date after "Ir a Hoy", recent-dates jumps, or edits
+        cells = event.selection.cells
+        cell = (current_year, current_month, *cells[0]) if cells else None
+        if cell is not None and cell != st.session_state.get('_cal_last_cell'):
+            st.session_state._cal_last_cell = cell
+            row, col_name = cells[0]
+            col = month_df.columns.get_loc(col_name)
+            day = calendar.monthcalendar(current_year, current_month)[row][col]
+            if day:
+                date_obj = date(current_year, current_month, day)
+                if date_obj != st.session_state.selected_date:
+                    st.session_state.selected_date = date_obj
+                    # Update week start if in weekly mode
+                    if st.session_state.view_mode == 'weekly':
+                        days_since_monday = date_obj.weekday()
+                        st.session_state.selected_week_start = date_obj - timedelta(days=days_since_monday)
+                    st.rerun()
+
+@st.fragment
+def render_recent_nav():
+    """Quick navigation to the most recent dates with tasks"""
+    st.write("**Fechas recientes con tareas:**")
+    # The date index is already sorted, so the 5 most recent dates are a
+    # slice, not a full sort; keys come from _iso() and are always valid
+    # ISO dates, and only these 5 ever get parsed, for display
+    for date_str in reversed(st.session_state._sorted_dates[-5:]):
+        task_count, completed_count = st.session_state._counts[date_str]
+        date_obj = _parse_date_key(date_str)
+        formatted_date = format_date_spanish(date_obj)
+
+        if st.button(f"{formatted_date} ({completed_count}/{task_count})",
+                    key=f"nav_{date_str}", use_container_width=True):
+            st.session_state.selected_date = date_obj
+            if st.session_state.view_mode == 'weekly':
+                days_since_monday = date_obj.weekday()
+                st.session_state.selected_week_start = date_obj - timedelta(days=days_since_monday)
+            st.rerun()
+
+@st.fragment
+def render_stats():
+    """Sidebar statistics and today's progress"""
+    st.divider()
+    st.subheader("📊 Estadísticas")
+
+    # Running counters make this O(1); no cache needed (st.cache_data is
+    # global, so keying it on a session-local counter leaked data between
+    # sessions)
+    total_tasks, completed_tasks = st.session_state._grand
+
+    if total_tasks > 0:
+        completion_rate = (completed_tasks / total_tasks) * 100
+        st.metric("Total de Tareas", total_tasks)
+        st.metric("Completadas", completed_tasks)
+        st.metric("Tasa de Finalización", f"{completion_rate:.1f}%")
+    else:
+        st.info("¡Aún no hay tareas!")
+
+    # Today's summary
+    today_counts = st.session_state._counts.get(TODAY_STR)
+    if today_counts:
+        today_total, today_completed = today_counts
+
+        st.write("**Progreso de Hoy:**")
+        st.progress(today_completed / today_total if today_total > 0 else 0)
+        st.write(f"{today_completed}/{today_total} completadas")
+
+
+def _render_edit_form(date_str, task_id, task, default_date, follow_move=False):
+    """Edit form shared by the daily and weekly views
+
+    Only one form is live at a time (editing_task_id), so the widget keys
+    need no per-view prefix. follow_move keeps selected_date on the task
+    when the daily view moves it to another day.
+    """
+    with st.form(key=f"edit_form_{task_id}"):
+        st.write("**Editar Tarea:**")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            edit_title = st.text_input("Título", value=task['title'], key=f"edit_title_{task_id}")
+            edit_priority = st.selectbox("Prioridad", _PRIORITIES,
+                                         index=_PRIORITIES.index(task['priority']),
+                                         format_func=_PRIORITY_ES.__getitem__,
+                                         key=f"edit_priority_{task_id}")
+        with col2:
+            edit_date = st.date_input("Mover a fecha",
+                                      value=default_date,
+                                      format="DD/MM/YYYY",
+                                      key=f"edit_date_{task_id}")
+            edit_description = st.text_area("Descripción",
+                                            value=task.get('description', ''),
+                                            key=f"edit_desc_{task_id}")
+
+        col_save, col_cancel = st.columns(2)
+        with col_save:
+            if st.form_submit_button("💾 Guardar", use_container_width=True):
+                new_date_str = _iso(edit_date)
+                edit_task(date_str, task_id, new_date_str, edit_title, edit_priority, edit_description)
+                st.session_state.editing_task_id = None
+                if follow_move and new_date_str != date_str:
+                    st.session_state.selected_date = edit_date
+                st.success("¡Tarea actualizada!")
+                st.rerun()
+        with col_cancel:
+            if st.form_submit_button("❌ Cancelar", use_container_width=True):
+                st.session_state.editing_task_id = None
+                st.rerun()
+
 
 def display_daily_tasks():
     """Display tasks for selected day"""
-    date_str = st.session_state.selected_date.strftime('%Y-%m-%d')
+    date_str = _iso(st.session_state.selected_date)
     st.subheader(f"Tareas para {format_date_long_spanish(st.session_state.selected_date)}")
     
     tasks = get_sorted_tasks(date_str)
-    
+
     if not tasks:
         st.info("No hay tareas para esta fecha. ¡Añade una tarea usando la barra lateral!")
     else:
+        # One form batches any number of checkbox toggles (plus the row
+        # actions) into a single rerun and a single save
+        pending_edit = None
+        pending_delete = None
+        with st.form("daily_tasks_form", clear_on_submit=False):
+            for task_id, task in tasks:
+                with st.container():
+                    col_check, col_content, col_actions = st.columns([0.5, 4, 1])
+
+                    with col_check:
+                        st.checkbox("", value=task['completed'], key=f"check_{task_id}")
+
+                    with col_content:
+                        priority_icon = _RANK_ICON[task['priority_rank']]
+                        priority_spanish = _RANK_ES[task['priority_rank']] or task['priority']
+
+                        # Native widgets skip the HTML parse/sanitize path
+                        if task['completed']:
+                            st.write(f"{priority_icon} ~~{task['title']}~~")
+                        else:
+                            st.write(f"{priority_icon} **{task['title']}**")
+                        caption = f"Prioridad: {priority_spanish}"
+                        if task['description']:
+                            caption += f" • {task['description']}"
+                        st.caption(caption)
+                        if task.get('moved_from'):
+                            st.caption("📁 Movida desde día anterior")
+
+                    with col_actions:
+                        col_edit, col_delete = st.columns(2)
+                        with col_edit:
+                            if st.form_submit_button("✏️", help="Editar tarea", key=f"edit_{task_id}"):
+                                pending_edit = task_id
+                        with col_delete:
+                            if st.form_submit_button("🗑️", help="Eliminar tarea", key=f"del_{task_id}"):
+                                pending_delete = task_id
+
+                    st.divider()
+
+            submitted = st.form_submit_button("✅ Actualizar", use_container_width=True)
+
+        if submitted or pending_edit or pending_delete:
+            # Apply every checkbox change in one pass; save_tasks coalesces
+            # them into a single write
+            for task_id, task in tasks:
+                if st.session_state.get(f"check_{task_id}", task['completed']) != task['completed']:
+                    toggle_task_completion(date_str, task_id)
+            if pending_delete:
+                delete_task(date_str, pending_delete)
+            if pending_edit:
+                st.session_state.editing_task_id = pending_edit
+            st.rerun()
+
+        # Edit forms can't nest inside the task form, so they render below
         for task_id, task in tasks:
-            with st.container():
-                col_check, col_content, col_actions = st.columns([0.5, 4, 1])
-                
-                with col_check:
-                    if st.checkbox("", value=task['completed'], key=f"check_{task_id}"):
-                        if not task['completed']:
-                            toggle_task_completion(date_str, task_id)
-                            st.rerun()
-                    elif task['completed']:
-                        toggle_task_completion(date_str, task_id)
-                        st.rerun()
-                
-                with col_content:
-                    priority_icon = get_priority_color(task['priority'])
-                    title_style = "text-decoration: line-through; opacity: 0.6;" if task['completed'] else ""
-                    priority_spanish = {'High': 'Alta', 'Medium': 'Media', 'Low': 'Baja'}.get(task['priority'], task['priority'])
-                    
-                    st.markdown(f"""
-                    <div style="{title_style}">
-                        {priority_icon} <strong>{task['title']}</strong>
-                        <br><small>Prioridad: {priority_spanish}</small>
-                        {f"<br><em>{task['description']}</em>" if task['description'] else ""}
-                        {'<br><small>📁 Movida desde día anterior</small>' if task.get('moved_from') else ''}
-                    </div>
-                    """, unsafe_allow_html=True)
-                
-                with col_actions:
-                    col_edit, col_delete = st.columns(2)
-                    with col_edit:
-                        if st.button("✏️", key=f"edit_{task_id}", help="Editar tarea"):
-                            st.session_state[f'editing_{task_id}'] = True
-                            st.rerun()
-                    with col_delete:
-                        if st.button("🗑️", key=f"del_{task_id}", help="Eliminar tarea"):
-                            delete_task(date_str, task_id)
-                            st.rerun()
-                
-                # Edit form (appears when edit button is clicked)
-                if st.session_state.get(f'editing_{task_id}', False):
-                    with st.form(key=f"edit_form_{task_id}"):
-                        st.write("**Editar Tarea:**")
-                        
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            edit_title = st.text_input("Título", value=task['title'], key=f"edit_title_{task_id}")
-                            edit_priority = st.selectbox("Prioridad", ["High", "Medium", "Low"], 
-                                                       index=["High", "Medium", "Low"].index(task['priority']),
-                                                       format_func=lambda x: {'High': 'Alta', 'Medium': 'Media', 'Low': 'Baja'}[x],
-                                                       key=f"edit_priority_{task_id}")
-                        with col2:
-                            edit_date = st.date_input("Mover a fecha", 
-                                                    value=st.session_state.selected_date, 
-                                                    format="DD/MM/YYYY",
-                                                    key=f"edit_date_{task_id}")
-                            edit_description = st.text_area("Descripción", 
-                                                           value=task.get('description', ''), 
-                                                           key=f"edit_desc_{task_id}")
-                        
-                        col_save, col_cancel = st.columns(2)
-                        with col_save:
-                            if st.form_submit_button("💾 Guardar", use_container_width=True):
-                                new_date_str = edit_date.strftime('%Y-%m-%d')
-                                edit_task(date_str, task_id, new_date_str, edit_title, edit_priority, edit_description)
-                                st.session_state[f'editing_{task_id}'] = False
-                                # Update selected date if task was moved
-                                if new_date_str != date_str:
-                                    st.session_state.selected_date = edit_date
-                                st.success("¡Tarea actualizada!")
-                                st.rerun()
-                        with col_cancel:
-                            if st.form_submit_button("❌ Cancelar", use_container_width=True):
-                                st.session_state[f'editing_{task_id}'] = False
-                                st.rerun()
-                
-                st.divider()
+            # Edit form (appears when edit button is clicked)
+            if st.session_state.editing_task_id == task_id:
+                _render_edit_form(date_str, task_id, task,
+                                  st.session_state.selected_date,
+                                  follow_move=True)
 
 def display_weekly_tasks():
     """Display tasks for selected week"""
@@ -410,102 +729,64 @@ def display_weekly_tasks():
             st.rerun()
     
     # Display each day of the week
-    days_spanish = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
-    
     for i in range(7):
         current_day = week_start + timedelta(days=i)
-        date_str = current_day.strftime('%Y-%m-%d')
-        day_name = days_spanish[i]
+        date_str = _iso(current_day)
+        day_name = _DAYS_ES[i]
         formatted_date = format_date_spanish(current_day)
         
         # Day header
-        is_today = current_day == datetime.now().date()
+        is_today = current_day == TODAY
         header_text = f"**{day_name}, {formatted_date}**"
         if is_today:
             header_text += " 📍"
         
         st.markdown(header_text)
         
-        # Tasks for this day
-        tasks = get_sorted_tasks(date_str)
-        
+        # Tasks for this day (only the top 5 are shown in weekly view)
+        tasks = get_top_tasks(date_str, 5)
+        day_total = st.session_state._counts.get(date_str, (0, 0))[0]
+
         if not tasks:
             st.markdown("*Sin tareas*")
         else:
-            # Create columns for tasks
-            for task_id, task in tasks[:5]:  # Show max 5 tasks per day in weekly view
-                col_check, col_content, col_actions = st.columns([0.3, 4, 0.5])
-                
-                with col_check:
-                    if st.checkbox("", value=task['completed'], key=f"week_check_{task_id}"):
-                        if not task['completed']:
-                            toggle_task_completion(date_str, task_id)
-                            st.rerun()
-                    elif task['completed']:
-                        toggle_task_completion(date_str, task_id)
-                        st.rerun()
-                
-                with col_content:
-                    priority_icon = get_priority_color(task['priority'])
-                    title_style = "text-decoration: line-through; opacity: 0.6;" if task['completed'] else ""
-                    st.markdown(f'<span style="{title_style}">{priority_icon} {task["title"]}</span>', unsafe_allow_html=True)
-                
-                with col_actions:
-                    col_edit, col_delete = st.columns(2)
-                    with col_edit:
-                        if st.button("✏️", key=f"week_edit_{task_id}", help="Editar tarea"):
-                            st.session_state[f'editing_{task_id}'] = True
-                            st.rerun()
-                    with col_delete:
-                        if st.button("🗑️", key=f"week_del_{task_id}", help="Eliminar tarea"):
-                            delete_task(date_str, task_id)
-                            st.rerun()
-                
-                # Edit form for weekly view
-                if st.session_state.get(f'editing_{task_id}', False):
-                    with st.form(key=f"week_edit_form_{task_id}"):
-                        st.write("**Editar Tarea:**")
-                        
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            edit_title = st.text_input("Título", value=task['title'], key=f"week_edit_title_{task_id}")
-                            edit_priority = st.selectbox("Prioridad", ["High", "Medium", "Low"], 
-                                                       index=["High", "Medium", "Low"].index(task['priority']),
-                                                       format_func=lambda x: {'High': 'Alta', 'Medium': 'Media', 'Low': 'Baja'}[x],
-                                                       key=f"week_edit_priority_{task_id}")
-                        with col2:
-                            edit_date = st.date_input("Mover a fecha", 
-                                                    value=current_day, 
-                                                    format="DD/MM/YYYY",
-                                                    key=f"week_edit_date_{task_id}")
-                            edit_description = st.text_area("Descripción", 
-                                                           value=task.get('description', ''), 
-                                                           key=f"week_edit_desc_{task_id}")
-                        
-                        col_save, col_cancel = st.columns(2)
-                        with col_save:
-                            if st.form_submit_button("💾 Guardar", use_container_width=True):
-                                new_date_str = edit_date.strftime('%Y-%m-%d')
-                                edit_task(date_str, task_id, new_date_str, edit_title, edit_priority, edit_description)
-                                st.session_state[f'editing_{task_id}'] = False
-                                st.success("¡Tarea actualizada!")
-                                st.rerun()
-                        with col_cancel:
-                            if st.form_submit_button("❌ Cancelar", use_container_width=True):
-                                st.session_state[f'editing_{task_id}'] = False
-                                st.rerun()
-            
+            # One data_editor per day instead of ~3 columns + checkbox +
+            # markdown + 2 buttons per task; rerun cost tracks widget count
+            day_df = pd.DataFrame({
+                'completed': [task['completed'] for _, task in tasks],
+                'task': [f"{_RANK_ICON[task['priority_rank']]} {task['title']}"
+                         for _, task in tasks],
+            })
+            edited = st.data_editor(
+                day_df,
+                key=f"week_{date_str}",
+                hide_index=True,
+                use_container_width=True,
+                column_config={
+                    'completed': st.column_config.CheckboxColumn('✔'),
+                    'task': st.column_config.TextColumn('Tarea', disabled=True),
+                },
+            )
+            # Apply any number of checkbox changes in one batch; the save
+            # coalesces them into a single write
+            for row, (task_id, task) in enumerate(tasks):
+                if bool(edited['completed'].iloc[row]) != task['completed']:
+                    toggle_task_completion(date_str, task_id)
+
             # Show "and X more" if there are more tasks
-            if len(tasks) > 5:
-                st.markdown(f"*... y {len(tasks) - 5} tareas más*")
+            if day_total > 5:
+                st.markdown(f"*... y {day_total - 5} tareas más*")
         
         st.divider()
 
 # Load tasks on startup
 load_tasks()
 
-# Auto-move incomplete tasks
-move_incomplete_tasks()
+# Auto-move incomplete tasks, at most once per calendar day; the sweep is
+# O(stale dates) and there is nothing new to move until the day rolls over
+if st.session_state.get('last_rollover_date') != TODAY_STR:
+    move_incomplete_tasks()
+    st.session_state.last_rollover_date = TODAY_STR
 
 # Update last activity timestamp
 st.session_state.last_activity = datetime.now()
@@ -548,17 +829,17 @@ with st.sidebar:
     if st.session_state.view_mode == 'daily':
         task_date = st.date_input("Fecha", value=st.session_state.selected_date, format="DD/MM/YYYY")
     else:
-        task_date = st.date_input("Fecha", value=datetime.now().date(), format="DD/MM/YYYY")
+        task_date = st.date_input("Fecha", value=TODAY, format="DD/MM/YYYY")
     
-    date_str = task_date.strftime('%Y-%m-%d')
+    date_str = _iso(task_date)
     
     # Task form
     with st.form("add_task_form"):
         task_title = st.text_input("Título de la Tarea*", placeholder="Ingresa el título de la tarea...")
         task_description = st.text_area("Descripción (opcional)", placeholder="Detalles de la tarea...")
-        task_priority = st.selectbox("Prioridad", ["High", "Medium", "Low"], 
+        task_priority = st.selectbox("Prioridad", _PRIORITIES,
                                    index=1,
-                                   format_func=lambda x: {'High': 'Alta', 'Medium': 'Media', 'Low': 'Baja'}[x])
+                                   format_func=_PRIORITY_ES.__getitem__)
         
         submitted = st.form_submit_button("Añadir Tarea")
         
@@ -580,33 +861,13 @@ with st.sidebar:
     st.subheader("🔍 Navegación Rápida")
     
     if st.button("📍 Ir a Hoy", use_container_width=True):
-        st.session_state.selected_date = datetime.now().date()
+        st.session_state.selected_date = TODAY
         if st.session_state.view_mode == 'weekly':
-            today = datetime.now().date()
-            days_since_monday = today.weekday()
-            st.session_state.selected_week_start = today - timedelta(days=days_since_monday)
+            st.session_state.selected_week_start = TODAY - timedelta(days=TODAY.weekday())
         st.rerun()
     
     # Show recent dates with tasks
-    st.write("**Fechas recientes con tareas:**")
-    dates_with_tasks = sorted([date for date in st.session_state.tasks.keys() if st.session_state.tasks[date]], reverse=True)
-    
-    for date_str in dates_with_tasks[:5]:
-        try:
-            date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
-            task_count = len(st.session_state.tasks[date_str])
-            completed_count = sum(1 for task in st.session_state.tasks[date_str].values() if task['completed'])
-            formatted_date = format_date_spanish(date_obj)
-            
-            if st.button(f"{formatted_date} ({completed_count}/{task_count})", 
-                        key=f"nav_{date_str}", use_container_width=True):
-                st.session_state.selected_date = date_obj
-                if st.session_state.view_mode == 'weekly':
-                    days_since_monday = date_obj.weekday()
-                    st.session_state.selected_week_start = date_obj - timedelta(days=days_since_monday)
-                st.rerun()
-        except ValueError:
-            continue
+    render_recent_nav()
 
 # Main content area
 if st.session_state.view_mode == 'daily':
@@ -615,38 +876,15 @@ else:
     display_weekly_tasks()
 
 # Statistics
-st.sidebar.divider()
-st.sidebar.subheader("📊 Estadísticas")
-
-total_tasks = sum(len(tasks) for tasks in st.session_state.tasks.values())
-completed_tasks = sum(1 for tasks in st.session_state.tasks.values() 
-                     for task in tasks.values() if task['completed'])
-
-if total_tasks > 0:
-    completion_rate = (completed_tasks / total_tasks) * 100
-    st.sidebar.metric("Total de Tareas", total_tasks)
-    st.sidebar.metric("Completadas", completed_tasks)
-    st.sidebar.metric("Tasa de Finalización", f"{completion_rate:.1f}%")
-else:
-    st.sidebar.info("¡Aún no hay tareas!")
-
-# Today's summary
-today_str = datetime.now().date().strftime('%Y-%m-%d')
-if today_str in st.session_state.tasks:
-    today_tasks = st.session_state.tasks[today_str]
-    today_total = len(today_tasks)
-    today_completed = sum(1 for task in today_tasks.values() if task['completed'])
-    
-    st.sidebar.write("**Progreso de Hoy:**")
-    st.sidebar.progress(today_completed / today_total if today_total > 0 else 0)
-    st.sidebar.write(f"{today_completed}/{today_total} completadas")
+with st.sidebar:
+    render_stats()
 
 # Data management
 st.sidebar.divider()
 st.sidebar.subheader("🔧 Gestión de Datos")
 
 # Auto backup notification with more prominence
-task_count = sum(len(tasks) for tasks in st.session_state.tasks.values())
+task_count = st.session_state._grand[0]
 if 'auto_refresh_enabled' not in st.session_state:
     st.session_state.auto_refresh_enabled = False
     
@@ -675,4 +913,7 @@ auto_refresh = st.sidebar.checkbox(
 
 if auto_refresh != st.session_state.get('auto_refresh_enabled', False):
     st.session_state.auto_refresh_enabled = auto_refresh
-    st.rerun()
\ No newline at end of file
+    st.rerun()
+
+# Flush any pending task changes once per rerun, after all UI handlers ran
+_flush_tasks()
\ No newline at end of file